@@ -34,7 +34,8 @@ def filter_request(
     cfg: config.Config,
 ) -> werkzeug.Response | None:
 
-    accept_list = [l.strip() for l in request.headers.get('Accept-Encoding', '').split(',')]
+    # the parameters of a coding (e.g. 'gzip;q=0.8') are not part of the value
+    accept_list = [l.split(';', 1)[0].strip() for l in request.headers.get('Accept-Encoding', '').split(',')]
     if not ('gzip' in accept_list or 'deflate' in accept_list):
         return too_many_requests(network, "HTTP header Accept-Encoding did not contain gzip nor deflate")
     return None
@@ -30,7 +30,7 @@ from ._helpers import too_many_requests
 USER_AGENT = (
     r'('
     + r'unknown'
-    + r'|[Cc][Uu][Rr][Ll]|[wW]get|Scrapy|splash|JavaFX|FeedFetcher|python-requests|Go-http-client|Java|Jakarta|okhttp'
+    + r'|(?i:curl)|[wW]get|Scrapy|splash|JavaFX|FeedFetcher|python-requests|Go-http-client|Java|Jakarta|okhttp'
     + r'|HttpClient|Jersey|Python|libwww-perl|Ruby|SynHttpClient|UniversalFeedParser|Googlebot|GoogleImageProxy'
     + r'|bingbot|Baiduspider|yacybot|YandexMobileBot|YandexBot|Yahoo! Slurp|MJ12bot|AhrefsBot|archive.org_bot|msnbot'
     + r'|MJ12bot|SeznamBot|linkdexbot|Netvibes|SMTBot|zgrab|James BOT|Sogou|Abonti|Pixray|Spinn3r|SemrushBot|Exabot'
@@ -38,8 +38,9 @@ USER_AGENT = (
     # unmaintained Farside instances
     + r'|'
     + re.escape(r'Mozilla/5.0 (compatible; Farside/0.1.0; +https://farside.link)')
-    # other bots and client to block
-    + '|.*PetalBot.*'
+    # other bots and client to block (the pattern is matched at the beginning
+    # of the header, a trailing '.*' is not needed)
+    + '|.*PetalBot'
     + r')'
 )
 """Regular expression that matches to User-Agent_ from known *bots*"""
@@ -46,7 +46,7 @@ import flask
 import werkzeug
 
 from searx import redisdb
-from searx.redislib import incr_sliding_window, drop_counter
+from searx.redislib import incr_sliding_window, incr_sliding_windows, drop_counter
 
 from . import link_token
 from . import config
@@ -89,6 +89,17 @@ SUSPICIOUS_IP_MAX = 3
 """Maximum requests from one suspicious IP in the :py:obj:`SUSPICIOUS_IP_WINDOW`."""
 
 
+def _incr_burst_and_long_window(redis_client, network: IPv4Network | IPv6Network):
+    # both counters are incremented in one round trip to the redis DB
+    return incr_sliding_windows(
+        redis_client,
+        [
+            ('ip_limit.BURST_WINDOW' + network.compressed, BURST_WINDOW),
+            ('ip_limit.LONG_WINDOW' + network.compressed, LONG_WINDOW),
+        ],
+    )
+
+
 def filter_request(
     network: IPv4Network | IPv6Network,
     request: flask.Request,
@@ -124,23 +135,21 @@ def filter_request(
             logger.error("BLOCK: too many request from %s in SUSPICIOUS_IP_WINDOW (redirect to /)", network)
             return flask.redirect(flask.url_for('index'), code=302)
 
-        c = incr_sliding_window(redis_client, 'ip_limit.BURST_WINDOW' + network.compressed, BURST_WINDOW)
-        if c > BURST_MAX_SUSPICIOUS:
+        c_burst, c_long = _incr_burst_and_long_window(redis_client, network)
+        if c_burst > BURST_MAX_SUSPICIOUS:
             return too_many_requests(network, "too many request in BURST_WINDOW (BURST_MAX_SUSPICIOUS)")
 
-        c = incr_sliding_window(redis_client, 'ip_limit.LONG_WINDOW' + network.compressed, LONG_WINDOW)
-        if c > LONG_MAX_SUSPICIOUS:
+        if c_long > LONG_MAX_SUSPICIOUS:
             return too_many_requests(network, "too many request in LONG_WINDOW (LONG_MAX_SUSPICIOUS)")
 
         return None
 
     # vanilla limiter without extensions counts BURST_MAX and LONG_MAX
-    c = incr_sliding_window(redis_client, 'ip_limit.BURST_WINDOW' + network.compressed, BURST_WINDOW)
-    if c > BURST_MAX:
+    c_burst, c_long = _incr_burst_and_long_window(redis_client, network)
+    if c_burst > BURST_MAX:
         return too_many_requests(network, "too many request in BURST_WINDOW (BURST_MAX)")
 
-    c = incr_sliding_window(redis_client, 'ip_limit.LONG_WINDOW' + network.compressed, LONG_WINDOW)
-    if c > LONG_MAX:
+    if c_long > LONG_MAX:
         return too_many_requests(network, "too many request in LONG_WINDOW (LONG_MAX)")
 
     return None
@@ -25,11 +25,14 @@ The ``ip_lists`` method implements IP :py:obj:`block- <block_ip>` and
 # pylint: disable=unused-argument
 
 from __future__ import annotations
+from functools import lru_cache
 from typing import Tuple
 from ipaddress import (
     ip_network,
     IPv4Address,
     IPv6Address,
+    IPv4Network,
+    IPv6Network,
 )
 
 from . import config
@@ -45,6 +48,12 @@ SEARXNG_ORG = [
 """Passlist of IPs from the SearXNG organization, e.g. `check.searx.space`."""
 
 
+@lru_cache(maxsize=1024)
+def _ip_network(net: str) -> IPv4Network | IPv6Network:
+    # the lists are checked on each request, parse each member once
+    return ip_network(net, strict=False)
+
+
 def pass_ip(real_ip: IPv4Address | IPv6Address, cfg: config.Config) -> Tuple[bool, str]:
     """Checks if the IP on the subnet is in one of the members of the
     ``botdetection.ip_lists.pass_ip`` list.
@@ -52,7 +61,7 @@ def pass_ip(real_ip: IPv4Address | IPv6Address, cfg: config.Config) -> Tuple[boo
 
     if cfg.get('botdetection.ip_lists.pass_searxng_org', default=True):
         for net in SEARXNG_ORG:
-            net = ip_network(net, strict=False)
+            net = _ip_network(net)
             if real_ip.version == net.version and real_ip in net:
                 return True, f"IP matches {net.compressed} in SEARXNG_ORG list."
     return ip_is_subnet_of_member_in_list(real_ip, 'botdetection.ip_lists.pass_ip', cfg)
@@ -75,7 +84,7 @@ def ip_is_subnet_of_member_in_list(
 
     for net in cfg.get(list_name, default=[]):
         try:
-            net = ip_network(net, strict=False)
+            net = _ip_network(net)
         except ValueError:
             logger.error("invalid IP %s in %s", net, list_name)
             continue
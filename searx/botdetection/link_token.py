@@ -43,6 +43,8 @@ from ipaddress import (
 
 import string
 import random
+from functools import lru_cache
+
 import flask
 
 from searx import logger
@@ -81,13 +83,17 @@ def is_suspicious(network: IPv4Network | IPv6Network, request: flask.Request, re
         return False
 
     ping_key = get_ping_key(network, request)
-    if not redis_client.get(ping_key):
+    if renew:
+        # EXPIRE resets the expire time of an existing ping and reports whether
+        # the ping exists (one round trip to the redis DB instead of GET & SET)
+        found = redis_client.expire(ping_key, PING_LIVE_TIME)
+    else:
+        found = redis_client.get(ping_key)
+
+    if not found:
         logger.info("missing ping (IP: %s) / request: %s", network.compressed, ping_key)
         return True
 
-    if renew:
-        redis_client.set(ping_key, 1, ex=PING_LIVE_TIME)
-
     logger.debug("found ping for (client) network %s -> %s", network.compressed, ping_key)
     return False
 
@@ -116,16 +122,18 @@ def ping(request: flask.Request, token: str):
 def get_ping_key(network: IPv4Network | IPv6Network, request: flask.Request) -> str:
     """Generates a hashed key that fits (more or less) to a *WEB-browser
     session* in a network."""
-    return (
-        PING_KEY
-        + "["
-        + secret_hash(
-            network.compressed + request.headers.get('Accept-Language', '') + request.headers.get('User-Agent', '')
-        )
-        + "]"
+    return _ping_key(
+        network.compressed + request.headers.get('Accept-Language', '') + request.headers.get('User-Agent', '')
     )
 
 
+@lru_cache(maxsize=4096)
+def _ping_key(name: str) -> str:
+    # the same client sends its ping and a series of requests, don't compute the
+    # HMAC of the (long) user-agent string for each of them.
+    return PING_KEY + "[" + secret_hash(name) + "]"
+
+
 def token_is_valid(token) -> bool:
     valid = token == get_token()
     logger.debug("token is valid --> %s", valid)
@@ -94,6 +94,7 @@ Implementation
 
 from __future__ import annotations
 import sys
+import logging
 
 from pathlib import Path
 from ipaddress import ip_address
@@ -146,13 +147,13 @@ def get_cfg() -> config.Config:
 def filter_request(request: flask.Request) -> werkzeug.Response | None:
     # pylint: disable=too-many-return-statements
 
+    if request.path == '/healthz':
+        return None
+
     cfg = get_cfg()
     real_ip = ip_address(get_real_ip(request))
     network = get_network(real_ip, cfg)
 
-    if request.path == '/healthz':
-        return None
-
     # link-local
 
     if network.is_link_local:
@@ -200,7 +201,9 @@ def filter_request(request: flask.Request) -> werkzeug.Response | None:
             val = func.filter_request(network, request, cfg)
             if val is not None:
                 return val
-    logger.debug(f"OK {network}: %s", dump_request(flask.request))
+    if logger.isEnabledFor(logging.DEBUG):
+        # dump_request formats a dozen of HTTP headers, don't call it for nothing
+        logger.debug("OK %s: %s", network, dump_request(request))
     return None
 
 
@@ -97,6 +97,44 @@ def request(method, url, **kwargs):
             raise httpx.TimeoutException('Timeout', request=None) from e
 
 
+async def arequest(method, url, network_name=None, **kwargs):
+    """Coroutine version of :py:obj:`request`, to be awaited in the event loop
+    of :py:obj:`get_loop`.  Instead of blocking a thread on the response, the
+    coroutine yields to the event loop, so concurrent requests can share the loop
+    (and the HTTP/2 connections of the network).
+
+    The thread context (:py:obj:`set_context_network_name`,
+    :py:obj:`set_timeout_for_thread`) is not used: the network is selected by
+    ``network_name`` (the default network if the name is unknown) and the
+    deadline is the ``timeout`` argument (2 minutes if unset), propagated by
+    :py:obj:`asyncio.wait_for`.
+    """
+    network = get_network(network_name) or get_network()
+    # same overhead as _get_timeout, but without the timeout of the thread
+    timeout = (kwargs.get('timeout') or 120) + 0.2
+    try:
+        return await asyncio.wait_for(network.request(method, url, **kwargs), timeout)
+    except asyncio.TimeoutError as e:
+        raise httpx.TimeoutException('Timeout', request=None) from e
+
+
+async def astream(method, url, network_name=None, **kwargs):
+    """Coroutine version of :py:obj:`stream`, to be awaited in the event loop of
+    :py:obj:`get_loop`.
+
+    Usage::
+
+        async with await astream('GET', url) as response:
+            async for chunk in response.aiter_raw():
+                ...
+
+    The network is selected by ``network_name`` (the default network if the
+    name is unknown).
+    """
+    network = get_network(network_name) or get_network()
+    return await network.stream(method, url, **kwargs)
+
+
 def multi_requests(request_list: List["Request"]) -> List[Union[httpx.Response, Exception]]:
     """send multiple HTTP requests in parallel. Wait for all requests to finish."""
     with _record_http_time() as start_time:
@@ -5,8 +5,12 @@
 import atexit
 import asyncio
 import ipaddress
+import logging
+import math
+import socket
+from functools import lru_cache
 from itertools import cycle
-from typing import Dict
+from typing import Dict, Iterator, Optional, Tuple
 
 import httpx
 
@@ -32,7 +36,71 @@ PROXY_PATTERN_MAPPING = {
     'socks5h:': 'socks5h://',
 }
 
-ADDRESS_MAPPING = {'ipv4': '0.0.0.0', 'ipv6': '::'}
+MAX_ADDRESS_ROTATION = 4096
+"""Maximum number of local addresses that are expanded in advance, larger
+networks (e.g. an IPv4 ``/16`` or an IPv6 ``/64``) are expanded on the fly."""
+
+
+@lru_cache(maxsize=512)
+def parse_ipaddress(address: str):
+    """Returns the :py:obj:`ipaddress.ip_network` of ``address`` if it contains
+    a ``/``, otherwise the :py:obj:`ipaddress.ip_address`.  The engines share a
+    few source IPs, the parsed (immutable) objects are cached."""
+    if '/' in address:
+        return ipaddress.ip_network(address, False)
+    return ipaddress.ip_address(address)
+
+
+@lru_cache(maxsize=64)
+def get_ipaddress_rotation(local_addresses: Tuple[str, ...]) -> Optional[Tuple[str, ...]]:
+    """Returns the rotation of the ``local_addresses`` as a tuple of strings,
+    the networks (``/`` in the address) are expanded to their hosts.  Returns
+    ``None`` if the networks have more than :py:obj:`MAX_ADDRESS_ROTATION`
+    addresses.
+
+    The networks of the engines inherit ``outgoing.source_ips``: the rotation
+    is cached and the networks with the same local addresses share one tuple.
+    """
+    networks = []
+    count = 0
+    for address in local_addresses:
+        if '/' in address:
+            network = parse_ipaddress(address)
+            count += network.num_addresses
+            if count > MAX_ADDRESS_ROTATION:
+                return None
+            networks.append(iter_hosts(network))
+        else:
+            networks.append((str(parse_ipaddress(address)),))
+    return tuple(a for hosts in networks for a in hosts)
+
+
+def iter_hosts(network) -> Iterator[str]:
+    """Yields the hosts of ``network`` as strings, the same as
+    ``str(host) for host in network.hosts()``.  The IPv4 hosts are computed by
+    integer arithmetic and formatted by :py:obj:`socket.inet_ntop`.  The IPv6
+    hosts are formatted by :py:obj:`ipaddress.IPv6Address`: ``inet_ntop``
+    writes IPv4-mapped and IPv4-compatible addresses in dotted notation
+    (``::ffff:10.0.0.1`` instead of ``::ffff:a00:1``).
+
+    Used by the (cached) :py:obj:`get_ipaddress_rotation`, which expands at
+    most :py:obj:`MAX_ADDRESS_ROTATION` addresses, and by the lazy
+    :py:obj:`Network._iter_ipaddress_cycle`.  Don't expand a network of
+    unbounded size with it."""
+    if network.num_addresses <= 2:
+        # /31, /32, /127 and /128 are special cases of hosts()
+        for address in network.hosts():
+            yield str(address)
+        return
+    first = int(network.network_address) + 1
+    if network.version == 4:
+        for i in range(first, int(network.broadcast_address)):
+            yield socket.inet_ntop(socket.AF_INET, i.to_bytes(4, 'big'))
+        return
+    # IPv6 has no broadcast address, only the Subnet-Router anycast address
+    # (the network address) is excluded
+    for i in range(first, int(network.broadcast_address) + 1):
+        yield str(ipaddress.IPv6Address(i))
 
 
 class Network:
@@ -50,9 +118,13 @@ class Network:
         'max_redirects',
         'retries',
         'retry_on_http_error',
+        '_retry_status_codes',
         '_local_addresses_cycle',
         '_proxies_cycle',
+        '_proxies_dicts',
+        '_single_route',
         '_clients',
+        '_clients_lock',
         '_logger',
     )
 
@@ -82,85 +154,181 @@ class Network:
         self.max_connections = max_connections
         self.max_keepalive_connections = max_keepalive_connections
         self.keepalive_expiry = keepalive_expiry
-        self.proxies = proxies
+        # canonical and hashable forms of the proxies & local_addresses settings
+        self.proxies = self.decode_proxies(proxies)
         self.using_tor_proxy = using_tor_proxy
-        self.local_addresses = local_addresses
+        self.local_addresses = self.decode_local_addresses(local_addresses)
         self.retries = retries
         self.retry_on_http_error = retry_on_http_error
+        self._retry_status_codes = self.decode_retry_on_http_error(retry_on_http_error)
         self.max_redirects = max_redirects
+        self.check_parameters()
         self._local_addresses_cycle = self.get_ipaddress_cycle()
-        self._proxies_cycle = self.get_proxy_cycles()
+        proxy_rotation = self.get_proxy_rotation()
+        self._proxies_cycle = cycle(proxy_rotation)
+        # the proxies argument of new_client is read only: build each dict once
+        self._proxies_dicts = {proxies: dict(proxies) for proxies in proxy_rotation}
+        # without rotation (at most one proxy per pattern and one local IP) each
+        # request uses the same (local_address, proxies) route: skip the cycles.
+        self._single_route = None
+        if len(proxy_rotation) == 1 and len(self.local_addresses) <= 1 and '/' not in ''.join(self.local_addresses):
+            self._single_route = (next(self._local_addresses_cycle), proxy_rotation[0])
         self._clients = {}
+        # created lazily: the lock has to be created in the event loop of get_loop()
+        self._clients_lock = None
         self._logger = logger.getChild(logger_name) if logger_name else logger
-        self.check_parameters()
 
     def check_parameters(self):
-        for address in self.iter_ipaddresses():
-            if '/' in address:
-                ipaddress.ip_network(address, False)
-            else:
-                ipaddress.ip_address(address)
+        for address in self.local_addresses:
+            parse_ipaddress(address)
 
-        if self.proxies is not None and not isinstance(self.proxies, (str, dict)):
-            raise ValueError('proxies type has to be str, dict or None')
+    @staticmethod
+    def decode_retry_on_http_error(retry_on_http_error) -> frozenset:
+        """Returns the ``retry_on_http_error`` setting (``True``, a status code
+        or a list of status codes) as the frozenset of the status codes to retry."""
+        if retry_on_http_error is True:
+            return frozenset(range(400, 600))
+        if isinstance(retry_on_http_error, list):
+            return frozenset(retry_on_http_error)
+        if isinstance(retry_on_http_error, int) and not isinstance(retry_on_http_error, bool):
+            return frozenset((retry_on_http_error,))
+        return frozenset()
 
-    def iter_ipaddresses(self):
-        local_addresses = self.local_addresses
+    @staticmethod
+    def decode_local_addresses(local_addresses):
+        """Returns the ``local_addresses`` setting (``None``, a string or a list
+        of strings) as a tuple of strings."""
         if not local_addresses:
-            return
+            return ()
         if isinstance(local_addresses, str):
-            local_addresses = [local_addresses]
-        yield from local_addresses
+            return (local_addresses,)
+        return tuple(local_addresses)
+
+    @staticmethod
+    def decode_proxies(proxies):
+        """Returns the ``proxies`` setting (``None``, a string or a dict) as a
+        tuple of ``(pattern, proxy_urls)`` pairs, ``proxy_urls`` is a tuple of
+        strings.  The patterns of the requests compatible keys are mapped to
+        httpx patterns (see `proxy-keys`_).
+
+        .. _proxy-keys: https://www.python-httpx.org/compatibility/#proxy-keys
+        """
+        if proxies is None:
+            # the common case: no proxies in outgoing nor in the engine
+            return ()
+        if not isinstance(proxies, (str, dict)):
+            raise ValueError('proxies type has to be str, dict or None')
+        if not proxies:
+            return ()
+        if isinstance(proxies, str):
+            return (('all://', (proxies,)),)
+        result = []
+        for pattern, proxy_url in proxies.items():
+            if '://' not in pattern:
+                # requests compatibility: map 'http' or 'http:' to 'http://'
+                pattern = PROXY_PATTERN_MAPPING.get(pattern, pattern)
+            if isinstance(proxy_url, str):
+                proxy_url = (proxy_url,)
+            elif not isinstance(proxy_url, (list, tuple)):
+                # e.g. a port without URL or a YAML key without value
+                raise ValueError('proxy URL has to be a str')
+            result.append((pattern, tuple(proxy_url)))
+        if not all(isinstance(url, str) for _, proxy_urls in result for url in proxy_urls):
+            raise ValueError('proxy URL has to be a str')
+        return tuple(result)
 
     def get_ipaddress_cycle(self):
+        rotation = get_ipaddress_rotation(self.local_addresses)
+        if rotation is None:
+            return self._iter_ipaddress_cycle()
+        # the rotation is expanded once, not in each lap
+        return cycle(rotation or (None,))
+
+    def _iter_ipaddress_cycle(self):
         while True:
             count = 0
-            for address in self.iter_ipaddresses():
+            for address in self.local_addresses:
                 if '/' in address:
-                    for a in ipaddress.ip_network(address, False).hosts():
-                        yield str(a)
+                    for a in iter_hosts(parse_ipaddress(address)):
+                        yield a
                         count += 1
                 else:
-                    a = ipaddress.ip_address(address)
+                    a = parse_ipaddress(address)
                     yield str(a)
                     count += 1
             if count == 0:
                 yield None
 
-    def iter_proxies(self):
-        if not self.proxies:
-            return
-        # https://www.python-httpx.org/compatibility/#proxy-keys
-        if isinstance(self.proxies, str):
-            yield 'all://', [self.proxies]
-        else:
-            for pattern, proxy_url in self.proxies.items():
-                pattern = PROXY_PATTERN_MAPPING.get(pattern, pattern)
-                if isinstance(proxy_url, str):
-                    proxy_url = [proxy_url]
-                yield pattern, proxy_url
-
-    def get_proxy_cycles(self):
-        proxy_settings = {}
-        for pattern, proxy_urls in self.iter_proxies():
-            proxy_settings[pattern] = cycle(proxy_urls)
-        while True:
-            # pylint: disable=stop-iteration-return
-            yield tuple((pattern, next(proxy_url_cycle)) for pattern, proxy_url_cycle in proxy_settings.items())
+    def get_proxy_rotation(self):
+        """Returns the rotation of the proxy settings, each item is a tuple of
+        ``(pattern, proxy_url)`` pairs.
+
+        The rotation is finite: its length is the least common multiple of the
+        number of proxy URLs per pattern.  It is computed once and the same tuples
+        are reused in each lap, no tuple is build per request.
+        """
+        proxy_settings = [(pattern, proxy_urls) for pattern, proxy_urls in self.proxies if proxy_urls]
+        if not proxy_settings:
+            return ((),)
+        rotation_length = 1
+        for _, proxy_urls in proxy_settings:
+            rotation_length = rotation_length * len(proxy_urls) // math.gcd(rotation_length, len(proxy_urls))
+        rotation = tuple(
+            tuple((pattern, proxy_urls[i % len(proxy_urls)]) for pattern, proxy_urls in proxy_settings)
+            for i in range(rotation_length)
+        )
+        return rotation
+
+    def _get_hook_log_response(self):
+        # Without DEBUG (e.g. SEARXNG_DEBUG_LOG_LEVEL=INFO) the response hook is
+        # not installed at all.
+        if searx_debug and self._logger.isEnabledFor(logging.DEBUG):
+            return self.log_response
+        return None
 
     async def log_response(self, response: httpx.Response):
+        # the hook is called for each response: don't format the message when
+        # the level DEBUG is not enabled
+        if not self._logger.isEnabledFor(logging.DEBUG):
+            return
         request = response.request
-        status = f"{response.status_code} {response.reason_phrase}"
-        response_line = f"{response.http_version} {status}"
         content_type = response.headers.get("Content-Type")
         content_type = f' ({content_type})' if content_type else ''
-        self._logger.debug(f'HTTP Request: {request.method} {request.url} "{response_line}"{content_type}')
+        self._logger.debug(
+            'HTTP Request: %s %s "%s %s %s"%s',
+            request.method,
+            request.url,
+            response.http_version,
+            response.status_code,
+            response.reason_phrase,
+            content_type,
+        )
 
     @staticmethod
     async def check_tor_proxy(client: httpx.AsyncClient, proxies) -> bool:
-        if proxies in Network._TOR_CHECK_RESULT:
-            return Network._TOR_CHECK_RESULT[proxies]
+        """Returns ``True`` if the requests of ``client`` go through Tor.  The
+        result is cached by ``proxies``.  While a check is running, the
+        concurrent calls for the same ``proxies`` await the same task: the
+        check.torproject.org API is requested once."""
+        result = Network._TOR_CHECK_RESULT.get(proxies)
+        if isinstance(result, bool):
+            return result
+        if result is None:
+            result = asyncio.ensure_future(Network._check_tor_proxy(client))
+            Network._TOR_CHECK_RESULT[proxies] = result
+        try:
+            # a cancelled caller does not cancel the check of the other callers
+            is_tor = await asyncio.shield(result)
+        except Exception:
+            # don't cache a failed check (e.g. a timeout), the next call tries again
+            if Network._TOR_CHECK_RESULT.get(proxies) is result:
+                del Network._TOR_CHECK_RESULT[proxies]
+            raise
+        Network._TOR_CHECK_RESULT[proxies] = is_tor
+        return is_tor
 
+    @staticmethod
+    async def _check_tor_proxy(client: httpx.AsyncClient) -> bool:
         result = True
         # ignore client._transport because it is not used with all://
         for transport in client._mounts.values():  # pylint: disable=protected-access
@@ -174,44 +342,56 @@ class Network:
         response = await client.get("https://check.torproject.org/api/ip", timeout=60)
         if not response.json()["IsTor"]:
             result = False
-        Network._TOR_CHECK_RESULT[proxies] = result
         return result
 
     async def get_client(self, verify=None, max_redirects=None):
         verify = self.verify if verify is None else verify
         max_redirects = self.max_redirects if max_redirects is None else max_redirects
-        local_address = next(self._local_addresses_cycle)
-        proxies = next(self._proxies_cycle)  # is a tuple so it can be part of the key
+        if self._single_route:
+            local_address, proxies = self._single_route
+        else:
+            local_address = next(self._local_addresses_cycle)
+            proxies = next(self._proxies_cycle)  # is a tuple so it can be part of the key
         key = (verify, max_redirects, local_address, proxies)
-        hook_log_response = self.log_response if searx_debug else None
-        if key not in self._clients or self._clients[key].is_closed:
-            client = new_client(
-                self.enable_http,
-                verify,
-                self.enable_http2,
-                self.max_connections,
-                self.max_keepalive_connections,
-                self.keepalive_expiry,
-                dict(proxies),
-                local_address,
-                0,
-                max_redirects,
-                hook_log_response,
-            )
-            if self.using_tor_proxy and not await self.check_tor_proxy(client, proxies):
-                await client.aclose()
-                raise httpx.ProxyError('Network configuration problem: not using Tor')
-            self._clients[key] = client
-        return self._clients[key]
+        client = self._clients.get(key)
+        if client is None or client.is_closed:
+            if self._clients_lock is None:
+                self._clients_lock = asyncio.Lock()
+            async with self._clients_lock:
+                # double-checked: an other coroutine may have created the client
+                # while this one was waiting for the lock (e.g. during the Tor check)
+                client = self._clients.get(key)
+                if client is None or client.is_closed:
+                    client = new_client(
+                        self.enable_http,
+                        verify,
+                        self.enable_http2,
+                        self.max_connections,
+                        self.max_keepalive_connections,
+                        self.keepalive_expiry,
+                        self._proxies_dicts[proxies],
+                        local_address,
+                        0,
+                        max_redirects,
+                        self._get_hook_log_response(),
+                    )
+                    if self.using_tor_proxy and not await self.check_tor_proxy(client, proxies):
+                        await client.aclose()
+                        raise httpx.ProxyError('Network configuration problem: not using Tor')
+                    self._clients[key] = client
+        return client
 
-    async def aclose(self):
-        async def close_client(client):
-            try:
-                await client.aclose()
-            except httpx.HTTPError:
-                pass
+    @staticmethod
+    async def aclose_client(client: httpx.AsyncClient):
+        try:
+            await client.aclose()
+        except httpx.HTTPError:
+            pass
 
-        await asyncio.gather(*[close_client(client) for client in self._clients.values()], return_exceptions=False)
+    async def aclose(self):
+        await asyncio.gather(
+            *[self.aclose_client(client) for client in self._clients.values()], return_exceptions=False
+        )
 
     @staticmethod
     def extract_kwargs_clients(kwargs):
@@ -227,11 +407,7 @@ class Network:
 
     @staticmethod
     def extract_do_raise_for_httperror(kwargs):
-        do_raise_for_httperror = True
-        if 'raise_for_httperror' in kwargs:
-            do_raise_for_httperror = kwargs['raise_for_httperror']
-            del kwargs['raise_for_httperror']
-        return do_raise_for_httperror
+        return kwargs.pop('raise_for_httperror', True)
 
     @staticmethod
     def patch_response(response, do_raise_for_httperror):
@@ -247,14 +423,9 @@ class Network:
         return response
 
     def is_valid_response(self, response):
-        # pylint: disable=too-many-boolean-expressions
-        if (
-            (self.retry_on_http_error is True and 400 <= response.status_code <= 599)
-            or (isinstance(self.retry_on_http_error, list) and response.status_code in self.retry_on_http_error)
-            or (isinstance(self.retry_on_http_error, int) and response.status_code == self.retry_on_http_error)
-        ):
-            return False
-        return True
+        # the status code is not read if there is nothing to retry: in stream
+        # mode, response is the (not yet entered) context manager of client.stream
+        return not self._retry_status_codes or response.status_code not in self._retry_status_codes
 
     async def call_client(self, stream, method, url, **kwargs):
         retries = self.retries
@@ -292,25 +463,42 @@ class Network:
         return await self.call_client(True, method, url, **kwargs)
 
     @classmethod
-    async def aclose_all(cls):
-        await asyncio.gather(*[network.aclose() for network in NETWORKS.values()], return_exceptions=False)
+    async def aclose_all(cls, timeout=None):
+        """Close the HTTP clients of all networks.  A network referenced by
+        several engines is closed once.  The clients which are not closed after
+        ``timeout`` seconds are abandoned."""
+        clients = {}
+        for network in dict.fromkeys(NETWORKS.values()):
+            clients.update(dict.fromkeys(network._clients.values()))  # pylint: disable=protected-access
+        if clients:
+            await asyncio.wait(
+                [asyncio.ensure_future(cls.aclose_client(client)) for client in clients], timeout=timeout
+            )
 
 
 def get_network(name=None):
+    if not NETWORKS:
+        # initialize() has not been called (yet): the default network is
+        # created on first use and not when the module is imported.
+        NETWORKS[DEFAULT_NAME] = Network()
     return NETWORKS.get(name or DEFAULT_NAME)
 
 
 def check_network_configuration():
+    async def check_network(network):
+        try:
+            await network.get_client()
+        except Exception:  # pylint: disable=broad-except
+            network._logger.exception('Error')  # pylint: disable=protected-access
+            return False
+        return True
+
     async def check():
-        exception_count = 0
-        for network in NETWORKS.values():
-            if network.using_tor_proxy:
-                try:
-                    await network.get_client()
-                except Exception:  # pylint: disable=broad-except
-                    network._logger.exception('Error')  # pylint: disable=protected-access
-                    exception_count += 1
-        return exception_count
+        # the networks are checked concurrently, a network referenced by
+        # several engines is checked once
+        networks = [network for network in dict.fromkeys(NETWORKS.values()) if network.using_tor_proxy]
+        results = await asyncio.gather(*[check_network(network) for network in networks])
+        return results.count(False)
 
     future = asyncio.run_coroutine_threadsafe(check(), get_loop())
     exception_count = future.result()
@@ -347,9 +535,7 @@ def initialize(settings_engines=None, settings_outgoing=None):
 
     def new_network(params, logger_name=None):
         nonlocal default_params
-        result = {}
-        result.update(default_params)
-        result.update(params)
+        result = {**default_params, **params}
         if logger_name:
             result['logger_name'] = logger_name
         return Network(**result)
@@ -415,11 +601,9 @@ def done():
     try:
         loop = get_loop()
         if loop:
-            future = asyncio.run_coroutine_threadsafe(Network.aclose_all(), loop)
-            # wait 3 seconds to close the HTTP clients
+            # wait 3 seconds to close the HTTP clients, aclose_all gives up
+            # before: a slow client does not raise a TimeoutError at exit
+            future = asyncio.run_coroutine_threadsafe(Network.aclose_all(timeout=2.5), loop)
             future.result(3)
     finally:
         NETWORKS.clear()
-
-
-NETWORKS[DEFAULT_NAME] = Network()
@@ -9,7 +9,7 @@ from os.path import abspath, basename, dirname, exists, join
 from shutil import copyfile
 from pkgutil import iter_modules
 from logging import getLogger
-from typing import List, Tuple
+from typing import Callable, List, Tuple
 
 from searx import logger, settings
 
@@ -195,16 +195,30 @@ class PluginStore:
     def register(self, plugin):
         self.plugins.append(plugin)
 
+    def get_hooks(self, ordered_plugin_list, plugin_type) -> List[Tuple[Plugin, Callable]]:
+        """Returns the ``(plugin, hook)`` pairs of the plugins in
+        ``ordered_plugin_list`` which implement ``plugin_type``.  The hooks of a
+        search can be looked up once and called by :py:obj:`PluginStore.call_hooks`
+        (e.g. ``on_result`` is called for each result)."""
+        hooks = []
+        for plugin in ordered_plugin_list:
+            hook = getattr(plugin, plugin_type, None)
+            if hook is not None:
+                hooks.append((plugin, hook))
+        return hooks
+
     def call(self, ordered_plugin_list, plugin_type, *args, **kwargs):
+        return self.call_hooks(self.get_hooks(ordered_plugin_list, plugin_type), plugin_type, *args, **kwargs)
+
+    def call_hooks(self, hooks, plugin_type, *args, **kwargs):
         ret = True
-        for plugin in ordered_plugin_list:
-            if hasattr(plugin, plugin_type):
-                try:
-                    ret = getattr(plugin, plugin_type)(*args, **kwargs)
-                    if not ret:
-                        break
-                except Exception:  # pylint: disable=broad-except
-                    plugin.logger.exception("Exception while calling %s", plugin_type)
+        for plugin, hook in hooks:
+            try:
+                ret = hook(*args, **kwargs)
+                if not ret:
+                    break
+            except Exception:  # pylint: disable=broad-except
+                plugin.logger.exception("Exception while calling %s", plugin_type)
         return ret
 
 
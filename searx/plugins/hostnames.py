@@ -117,10 +117,35 @@ def _load_regular_expressions_with_fallback(settings_key):
     return {re.compile(p) for (p, r) in hostname_replace_config.items() if not r}
 
 
+_backreference = re.compile(r'\\[1-9]|\(\?P=')
+
+
+def _join_patterns(patterns):
+    """Joins the regular expressions of ``patterns`` into one alternation, a
+    hostname is then tested by one search instead of one search per pattern.
+    Patterns with backreferences or inline flags are not joined (the group
+    numbers and the flags would change) and are returned as they are."""
+    joinable = []
+    others = []
+    for pattern in patterns:
+        if pattern.flags != re.UNICODE or _backreference.search(pattern.pattern):
+            others.append(pattern)
+        else:
+            joinable.append(pattern)
+    if len(joinable) > 1:
+        try:
+            joinable = [re.compile('|'.join('(?:%s)' % pattern.pattern for pattern in joinable))]
+        except re.error:
+            pass
+    return joinable + others
+
+
 replacements = _load_regular_expressions_with_fallback('replace')
-removables = _load_regular_expressions_with_fallback('remove')
-high_priority = _load_regular_expressions('high_priority')
-low_priority = _load_regular_expressions('low_priority')
+# on_result iterates over the (pattern, replacement) pairs
+replacements = list(replacements.items()) if isinstance(replacements, dict) else []
+removables = _join_patterns(_load_regular_expressions_with_fallback('remove'))
+high_priority = _join_patterns(_load_regular_expressions('high_priority'))
+low_priority = _join_patterns(_load_regular_expressions('low_priority'))
 
 
 def _matches_parsed_url(result, pattern):
@@ -128,33 +153,35 @@ def _matches_parsed_url(result, pattern):
 
 
 def on_result(_request, _search, result):
-    for pattern, replacement in replacements.items():
+    # parse the URL fields once, not once per pattern (and only if there are
+    # patterns to apply on them)
+    parsed_url_fields = {}
+    if replacements or removables:
+        for url_field in _url_fields:
+            if result.get(url_field):
+                parsed_url_fields[url_field] = urlparse(result[url_field])
+
+    for pattern, replacement in replacements:
         if _matches_parsed_url(result, pattern):
             logger.debug(result['url'])
             result[parsed] = result[parsed]._replace(netloc=pattern.sub(replacement, result[parsed].netloc))
             result['url'] = urlunparse(result[parsed])
             logger.debug(result['url'])
 
-        for url_field in _url_fields:
-            if not result.get(url_field):
-                continue
-
-            url_src = urlparse(result[url_field])
+        for url_field, url_src in parsed_url_fields.items():
             if pattern.search(url_src.netloc):
                 url_src = url_src._replace(netloc=pattern.sub(replacement, url_src.netloc))
+                parsed_url_fields[url_field] = url_src
                 result[url_field] = urlunparse(url_src)
 
     for pattern in removables:
         if _matches_parsed_url(result, pattern):
             return False
 
-        for url_field in _url_fields:
-            if not result.get(url_field):
-                continue
-
-            url_src = urlparse(result[url_field])
+        for url_field, url_src in list(parsed_url_fields.items()):
             if pattern.search(url_src.netloc):
                 del result[url_field]
+                del parsed_url_fields[url_field]
 
     for pattern in low_priority:
         if _matches_parsed_url(result, pattern):
@@ -16,9 +16,15 @@ preference_section = 'general'
 
 
 def extract_doi(url):
-    match = regex.search(url.path)
-    if match:
-        return match.group(0)
+    # most result URLs don't contain a DOI: test for the '10.' prefix of a DOI
+    # before the regular expression (and the parsing of the query) is applied.
+    if '10.' in url.path:
+        match = regex.search(url.path)
+        if match:
+            return match.group(0)
+    # the values of the query are URL-decoded, the '.' might be encoded
+    if '10' not in url.query:
+        return None
     for _, v in parse_qsl(url.query):
         match = regex.search(v)
         if match:
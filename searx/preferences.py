@@ -7,8 +7,9 @@
 from base64 import urlsafe_b64encode, urlsafe_b64decode
 from zlib import compress, decompress
 from urllib.parse import parse_qs, urlencode
-from typing import Iterable, Dict, List, Optional
+from typing import Iterable, Dict, FrozenSet, List, Optional, Tuple
 from collections import OrderedDict
+from functools import lru_cache
 
 import flask
 import babel
@@ -288,12 +289,8 @@ class EnginesSetting(BooleanChoices):
     """Engine settings"""
 
     def __init__(self, default_value, engines: Iterable[Engine]):
-        choices = {}
-        for engine in engines:
-            for category in engine.categories:
-                if not category in list(settings['categories_as_tabs'].keys()) + [DEFAULT_CATEGORY]:
-                    continue
-                choices['{}__{}'.format(engine.name, category)] = not engine.disabled
+        tab_categories = frozenset(list(settings['categories_as_tabs'].keys()) + [DEFAULT_CATEGORY])
+        choices = dict(_engines_choices(tuple(engines), tab_categories))
         super().__init__(default_value, choices)
 
     def transform_form_items(self, items):
@@ -309,6 +306,20 @@ class EnginesSetting(BooleanChoices):
         return transformed_values
 
 
+@lru_cache(maxsize=8)
+def _engines_choices(engines: Tuple[Engine, ...], tab_categories: FrozenSet[str]) -> Dict[str, bool]:
+    # The preferences are instantiated for each request, the default choices of
+    # the (loaded) engines don't change.  Callers must not modify the returned
+    # dictionary.
+    choices = {}
+    for engine in engines:
+        for category in engine.categories:
+            if category not in tab_categories:
+                continue
+            choices['{}__{}'.format(engine.name, category)] = not engine.disabled
+    return choices
+
+
 class PluginsSetting(BooleanChoices):
     """Plugin settings"""
 
@@ -577,15 +588,11 @@ class Preferences:
         return resp
 
     def validate_token(self, engine):
-        valid = True
-        if hasattr(engine, 'tokens') and engine.tokens:
-            valid = False
-            for token in self.tokens.values:
-                if token in engine.tokens:
-                    valid = True
-                    break
-
-        return valid
+        # called for each engine, the tokens of the user are already a set
+        engine_tokens = getattr(engine, 'tokens', None)
+        if not engine_tokens:
+            return True
+        return not self.tokens.values.isdisjoint(engine_tokens)
 
 
 def is_locked(setting_name: str):
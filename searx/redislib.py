@@ -173,7 +173,7 @@ local current_time = redis.call('TIME')
 
 redis.call('ZREMRANGEBYSCORE', name, 0, current_time[1] - expire)
 redis.call('ZADD', name, current_time[1], current_time[1] .. current_time[2])
-local result = redis.call('ZCOUNT', name, 0, current_time[1] + 1)
+local result = redis.call('ZCARD', name)
 redis.call('EXPIRE', name, expire)
 return result
 """
@@ -207,7 +207,7 @@ def incr_sliding_window(client, name: str, duration: int):
     call (increment) and if there is no call in this duration, the sorted
     set expires from the redis DB.
 
-    The return value is the amount of items in the sorted set (ZCOUNT_), what
+    The return value is the amount of items in the sorted set (ZCARD_), what
     means the number of calls in the sliding window.
 
     .. _Sorted sets in Redis:
@@ -216,7 +216,7 @@ def incr_sliding_window(client, name: str, duration: int):
     .. _ZADD: https://redis.io/commands/zadd/
     .. _EXPIRE: https://redis.io/commands/expire/
     .. _ZREMRANGEBYSCORE: https://redis.io/commands/zremrangebyscore/
-    .. _ZCOUNT: https://redis.io/commands/zcount/
+    .. _ZCARD: https://redis.io/commands/zcard/
 
     A simple demo of the sliding window::
 
@@ -238,3 +238,23 @@ def incr_sliding_window(client, name: str, duration: int):
     name = "SearXNG_counter_" + secret_hash(name)
     c = script(args=[duration], keys=[name])
     return c
+
+
+def incr_sliding_windows(client, windows):
+    """Increment several sliding-window counters and return the new values.
+    Same as :py:func:`incr_sliding_window` but the scripts of all counters are
+    sent in one pipeline, in one round trip to the redis DB.
+
+    :param windows: list of ``(name, duration)`` tuples, see arguments ``name``
+      and ``duration`` of :py:func:`incr_sliding_window`
+    :type windows: list
+
+    :return: values of the incremented counters (in the order of ``windows``)
+    :type return: list
+
+    """
+    script = lua_script_storage(client, INCR_SLIDING_WINDOW)
+    pipe = client.pipeline(transaction=False)
+    for name, duration in windows:
+        script(args=[duration], keys=["SearXNG_counter_" + secret_hash(name)], client=pipe)
+    return pipe.execute()
@@ -184,11 +184,14 @@ class Search:
 class SearchWithPlugins(Search):
     """Inherit from the Search class, add calls to the plugins."""
 
-    __slots__ = 'ordered_plugin_list', 'request'
+    __slots__ = 'ordered_plugin_list', 'request', 'on_result_hooks'
 
     def __init__(self, search_query: SearchQuery, ordered_plugin_list, request: flask.Request):
         super().__init__(search_query)
         self.ordered_plugin_list = ordered_plugin_list
+        # the plugins of the search don't change: look up their on_result hooks
+        # once and not for each result
+        self.on_result_hooks = plugins.get_hooks(ordered_plugin_list, 'on_result')
         self.result_container.on_result = self._on_result
         # pylint: disable=line-too-long
         # get the "real" request to use it outside the Flask context.
@@ -200,7 +203,7 @@ class SearchWithPlugins(Search):
         self.request = request._get_current_object()
 
     def _on_result(self, result):
-        return plugins.call(self.ordered_plugin_list, 'on_result', self.request, self, result)
+        return plugins.call_hooks(self.on_result_hooks, 'on_result', self.request, self, result)
 
     def search(self) -> ResultContainer:
         if plugins.call(self.ordered_plugin_list, 'pre_search', self.request, self):
@@ -161,11 +161,12 @@ def get_engineref_from_category_list(  # pylint: disable=invalid-name
     disabled_engines: List[str],
 ) -> List[EngineRef]:
     result = []
+    # the list of disabled (engine, category) pairs is tested for each engine
+    # of the categories
+    disabled = set(disabled_engines)
     for categ in category_list:
         result.extend(
-            EngineRef(engine.name, categ)
-            for engine in categories[categ]
-            if (engine.name, categ) not in disabled_engines
+            EngineRef(engine.name, categ) for engine in categories[categ] if (engine.name, categ) not in disabled
         )
     return result
 
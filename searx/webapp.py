@@ -474,6 +474,10 @@ def pre_request():
     request.timings = []  # pylint: disable=assigning-non-slot
     request.errors = []  # pylint: disable=assigning-non-slot
 
+    if request.path == '/healthz':
+        # the health check neither needs the preferences nor the plugins
+        return
+
     client_pref = ClientPref.from_http_request(request)
     # pylint: disable=redefined-outer-name
     preferences = Preferences(themes, list(categories.keys()), engines, plugins, client_pref)
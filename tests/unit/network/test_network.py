@@ -1,11 +1,24 @@
 # SPDX-License-Identifier: AGPL-3.0-or-later
 # pylint: disable=missing-module-docstring, protected-access
 
-from mock import patch
+import asyncio
+import ipaddress
+import logging
+
+from mock import Mock, patch
 
 import httpx
 
-from searx.network.network import Network, NETWORKS, initialize
+from searx.network import arequest, astream
+from searx.network.network import (
+    Network,
+    NETWORKS,
+    DEFAULT_NAME,
+    initialize,
+    check_network_configuration,
+    iter_hosts,
+    get_ipaddress_rotation,
+)
 from tests import SearxTestCase
 
 
@@ -39,7 +52,22 @@ class TestNetwork(SearxTestCase):  # pylint: disable=missing-class-docstring
         self.assertEqual(next(network._local_addresses_cycle), '192.168.0.1')
         self.assertEqual(next(network._local_addresses_cycle), '192.168.0.2')
 
+        network = Network(local_addresses=['192.168.0.0/30', '192.168.1.1'])
+        self.assertEqual(get_ipaddress_rotation(network.local_addresses), ('192.168.0.1', '192.168.0.2', '192.168.1.1'))
+
+        # the networks with the same local addresses share the rotation
+        network = Network(local_addresses=['192.168.0.0/30', '192.168.1.1'])
+        self.assertIs(
+            get_ipaddress_rotation(network.local_addresses),
+            get_ipaddress_rotation(Network(local_addresses=['192.168.0.0/30', '192.168.1.1']).local_addresses),
+        )
+
+        network = Network(local_addresses=['10.0.0.0/16'])
+        self.assertIsNone(get_ipaddress_rotation(network.local_addresses))
+        self.assertEqual(next(network._local_addresses_cycle), '10.0.0.1')
+
         network = Network(local_addresses=['fe80::/10'])
+        self.assertIsNone(get_ipaddress_rotation(network.local_addresses))
         self.assertEqual(next(network._local_addresses_cycle), 'fe80::1')
         self.assertEqual(next(network._local_addresses_cycle), 'fe80::2')
         self.assertEqual(next(network._local_addresses_cycle), 'fe80::3')
@@ -47,6 +75,20 @@ class TestNetwork(SearxTestCase):  # pylint: disable=missing-class-docstring
         with self.assertRaises(ValueError):
             Network(local_addresses=['not_an_ip_address'])
 
+    def test_iter_hosts(self):
+        for address in (
+            '192.168.0.0/24',
+            '10.0.0.0/31',
+            '10.0.0.1/32',
+            'fe80::/120',
+            'fe80::/127',
+            'fe80::1/128',
+            '::ffff:a00:0/120',
+            '::a00:0/120',
+        ):
+            network = ipaddress.ip_network(address)
+            self.assertEqual(list(iter_hosts(network)), [str(a) for a in network.hosts()])
+
     def test_proxy_cycles(self):
         network = Network(proxies='http://localhost:1337')
         self.assertEqual(next(network._proxies_cycle), (('all://', 'http://localhost:1337'),))
@@ -69,8 +111,70 @@ class TestNetwork(SearxTestCase):  # pylint: disable=missing-class-docstring
             next(network._proxies_cycle), (('https://', 'http://localhost:1339'), ('http://', 'http://localhost:1338'))
         )
 
+        network = Network(
+            proxies={
+                'https': ['http://localhost:1337', 'http://localhost:1339'],
+                'http': ['http://localhost:1338', 'http://localhost:1340', 'http://localhost:1341'],
+            }
+        )
+        rotation = [next(network._proxies_cycle) for _ in range(6)]
+        self.assertEqual(len(set(rotation)), 6)
+        # the rotation is precomputed, the same tuples are reused in the next lap
+        for proxies in rotation:
+            self.assertIs(next(network._proxies_cycle), proxies)
+
         with self.assertRaises(ValueError):
             Network(proxies=1)
+        with self.assertRaises(ValueError):
+            Network(proxies={'https': ['http://localhost:1337', 1338]})
+        with self.assertRaises(ValueError):
+            Network(proxies={'https': 1338})
+        with self.assertRaises(ValueError):
+            Network(proxies={'https': None})
+
+    def test_hook_log_response(self):
+        network_logger = logging.getLogger('searx.network.test_hook_log_response')
+        with patch('searx.network.network.searx_debug', True):
+            try:
+                network_logger.setLevel(logging.DEBUG)
+                self.assertIsNotNone(Network(logger_name='test_hook_log_response')._get_hook_log_response())
+                network_logger.setLevel(logging.INFO)
+                self.assertIsNone(Network(logger_name='test_hook_log_response')._get_hook_log_response())
+            finally:
+                network_logger.setLevel(logging.NOTSET)
+        with patch('searx.network.network.searx_debug', False):
+            self.assertIsNone(Network()._get_hook_log_response())
+
+    def test_decode_retry_on_http_error(self):
+        self.assertEqual(Network.decode_retry_on_http_error(None), frozenset())
+        self.assertEqual(Network.decode_retry_on_http_error(False), frozenset())
+        self.assertEqual(Network.decode_retry_on_http_error(403), {403})
+        self.assertEqual(Network.decode_retry_on_http_error([403, 429]), {403, 429})
+        self.assertEqual(Network.decode_retry_on_http_error(True), frozenset(range(400, 600)))
+
+    def test_decode_settings(self):
+        network = Network(
+            proxies={'https': ['http://localhost:1337', 'http://localhost:1339'], 'http:': 'http://localhost:1338'},
+            local_addresses=['192.168.0.1', '192.168.0.0/30'],
+        )
+        self.assertEqual(
+            network.proxies,
+            (
+                ('https://', ('http://localhost:1337', 'http://localhost:1339')),
+                ('http://', ('http://localhost:1338',)),
+            ),
+        )
+        self.assertEqual(network.local_addresses, ('192.168.0.1', '192.168.0.0/30'))
+        # the canonical forms are hashable
+        hash((network.proxies, network.local_addresses))
+
+        network = Network(proxies='http://localhost:1337', local_addresses='::')
+        self.assertEqual(network.proxies, (('all://', ('http://localhost:1337',)),))
+        self.assertEqual(network.local_addresses, ('::',))
+
+        network = Network()
+        self.assertEqual(network.proxies, ())
+        self.assertEqual(network.local_addresses, ())
 
     def test_get_kwargs_clients(self):
         kwargs = {
@@ -107,11 +211,106 @@ class TestNetwork(SearxTestCase):  # pylint: disable=missing-class-docstring
 
         await network.aclose()
 
+    async def test_get_client_single_route(self):
+        network = Network(local_addresses='192.168.0.1', proxies={'https': 'http://localhost:1337'})
+        self.assertEqual(network._single_route, ('192.168.0.1', (('https://', 'http://localhost:1337'),)))
+        client1 = await network.get_client()
+        client2 = await network.get_client()
+        self.assertIs(client1, client2)
+        await network.aclose()
+
+        network = Network(local_addresses=['192.168.0.1', '192.168.0.2'])
+        self.assertIsNone(network._single_route)
+        network = Network(local_addresses='192.168.0.0/30')
+        self.assertIsNone(network._single_route)
+
+    async def test_get_client_not_shared(self):
+        # each network has its own clients (and connection pools): a server
+        # disconnect in one network does not close the client of an other one
+        network1 = Network(verify=True)
+        network2 = Network(verify=True)
+        client1 = await network1.get_client()
+        client2 = await network2.get_client()
+        self.assertIsNot(client1, client2)
+
+        with patch.object(httpx.AsyncClient, 'request', side_effect=httpx.RemoteProtocolError('disconnected')):
+            with self.assertRaises(httpx.RemoteProtocolError):
+                await network1.request('GET', 'https://example.com/')
+        self.assertTrue(client1.is_closed)
+        self.assertFalse(client2.is_closed)
+
+        await network1.aclose()
+        await network2.aclose()
+
+    async def test_get_client_concurrent(self):
+        async def check_tor_proxy(*args, **kwargs):  # pylint: disable=unused-argument
+            await asyncio.sleep(0.01)
+            return True
+
+        with patch.object(Network, 'check_tor_proxy', new=check_tor_proxy):
+            network = Network(using_tor_proxy=True)
+            client1, client2 = await asyncio.gather(network.get_client(), network.get_client())
+            self.assertIs(client1, client2)
+            self.assertEqual(len(network._clients), 1)
+            await network.aclose()
+
+    async def test_check_tor_proxy(self):
+        calls = []
+
+        async def _check_tor_proxy(client):  # pylint: disable=unused-argument
+            calls.append(client)
+            await asyncio.sleep(0.01)
+            if len(calls) == 1:
+                raise httpx.ConnectTimeout('timeout')
+            return True
+
+        proxies = (('all://', 'socks5h://localhost:9050'),)
+        with patch.dict(Network._TOR_CHECK_RESULT), patch.object(Network, '_check_tor_proxy', new=_check_tor_proxy):
+            # a failed check is not cached
+            with self.assertRaises(httpx.ConnectTimeout):
+                await Network.check_tor_proxy(None, proxies)
+            self.assertNotIn(proxies, Network._TOR_CHECK_RESULT)
+            # concurrent checks of the same proxies: one request
+            results = await asyncio.gather(*[Network.check_tor_proxy(None, proxies) for _ in range(3)])
+            self.assertEqual(results, [True, True, True])
+            self.assertEqual(len(calls), 2)
+            self.assertIs(await Network.check_tor_proxy(None, proxies), True)
+            self.assertEqual(len(calls), 2)
+
+    def test_check_network_config(self):
+        async def check_tor_proxy(*args, **kwargs):  # pylint: disable=unused-argument
+            await asyncio.sleep(0.01)
+            return True
+
+        with patch.object(Network, 'check_tor_proxy', new=check_tor_proxy):
+            tor_network = Network(using_tor_proxy=True)
+            networks = {'tor1': tor_network, 'tor2': tor_network, 'tor3': Network(using_tor_proxy=True)}
+            with patch.dict(NETWORKS, networks):
+                check_network_configuration()
+                with patch.object(Network, 'get_client', side_effect=httpx.ProxyError('not using Tor')):
+                    with self.assertRaises(RuntimeError), self.assertLogs('searx.network', 'ERROR') as logs:
+                        check_network_configuration()
+                # the two distinct networks are checked and logged once each
+                self.assertEqual(len(logs.records), 2)
+
     async def test_aclose(self):
         network = Network(verify=True)
         await network.get_client()
         await network.aclose()
 
+    async def test_aclose_all(self):
+        with patch.dict(NETWORKS, clear=True):
+            NETWORKS['network1'] = network1 = Network(verify=True)
+            NETWORKS['network2'] = NETWORKS['network3'] = network2 = Network(verify=True)
+            client1 = await network1.get_client()
+            client2 = await network2.get_client()
+            with patch.object(Network, 'aclose_client', wraps=Network.aclose_client) as aclose_client:
+                await Network.aclose_all(timeout=1)
+            # network2 is referenced twice: its client is closed once
+            self.assertEqual(aclose_client.call_count, 2)
+            self.assertTrue(client1.is_closed)
+            self.assertTrue(client2.is_closed)
+
     async def test_request(self):
         a_text = 'Lorem Ipsum'
         response = httpx.Response(status_code=200, text=a_text)
@@ -122,6 +321,42 @@ class TestNetwork(SearxTestCase):  # pylint: disable=missing-class-docstring
             await network.aclose()
 
 
+class TestNetworkAsyncRequest(SearxTestCase):  # pylint: disable=missing-class-docstring
+
+    TEXT = 'Lorem Ipsum'
+
+    def setUp(self):
+        initialize()
+
+    async def test_arequest(self):
+        response = httpx.Response(status_code=200, text=TestNetworkAsyncRequest.TEXT)
+        with patch.object(httpx.AsyncClient, 'request', return_value=response):
+            response = await arequest('GET', 'https://example.com/', timeout=2)
+            self.assertEqual(response.text, TestNetworkAsyncRequest.TEXT)
+            # an unknown network name falls back to the default network
+            response = await arequest('GET', 'https://example.com/', network_name='unknown', timeout=2)
+            self.assertEqual(response.text, TestNetworkAsyncRequest.TEXT)
+            await NETWORKS[DEFAULT_NAME].aclose()
+
+    async def test_astream(self):
+        stream = Mock()
+        with patch.object(httpx.AsyncClient, 'stream', return_value=stream) as client_stream:
+            self.assertIs(await astream('GET', 'https://example.com/'), stream)
+            self.assertIs(await astream('GET', 'https://example.com/', network_name='unknown'), stream)
+            self.assertEqual(client_stream.call_count, 2)
+            await NETWORKS[DEFAULT_NAME].aclose()
+
+    async def test_arequest_timeout(self):
+        async def get_response(*args, **kwargs):  # pylint: disable=unused-argument
+            await asyncio.sleep(1)
+            return httpx.Response(status_code=200, text=TestNetworkAsyncRequest.TEXT)
+
+        with patch.object(httpx.AsyncClient, 'request', new=get_response):
+            with self.assertRaises(httpx.TimeoutException):
+                await arequest('GET', 'https://example.com/', timeout=0.01)
+            await NETWORKS[DEFAULT_NAME].aclose()
+
+
 class TestNetworkRequestRetries(SearxTestCase):  # pylint: disable=missing-class-docstring
 
     TEXT = 'Lorem Ipsum'
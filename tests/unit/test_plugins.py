@@ -1,13 +1,17 @@
 # SPDX-License-Identifier: AGPL-3.0-or-later
 # pylint: disable=missing-module-docstring
 
-from mock import Mock
+import re
+from urllib.parse import urlparse
+
+from mock import Mock, patch
 
 from searx import (
     plugins,
     limiter,
     botdetection,
 )
+from searx.plugins import hostnames, oa_doi_rewrite
 
 from tests import SearxTestCase
 
@@ -47,6 +51,22 @@ class PluginStoreTest(SearxTestCase):  # pylint: disable=missing-class-docstring
         store.call([testplugin], 'asdf', request, Mock())
         self.assertTrue(testplugin.asdf.called)  # pylint: disable=E1101
 
+    def test_PluginStore_call_hooks(self):
+        store = plugins.PluginStore()
+        testplugin1 = PluginMock()
+        testplugin1.on_result = Mock(return_value=True)  # pylint: disable=attribute-defined-outside-init
+        testplugin2 = PluginMock()
+        store.register(testplugin1)
+        store.register(testplugin2)
+
+        hooks = store.get_hooks(store.plugins, 'on_result')
+        self.assertEqual(hooks, [(testplugin1, testplugin1.on_result)])
+        self.assertTrue(store.call_hooks(hooks, 'on_result', Mock(), Mock(), Mock()))
+        self.assertEqual(testplugin1.on_result.call_count, 1)
+
+        testplugin1.on_result.return_value = False
+        self.assertFalse(store.call_hooks(hooks, 'on_result', Mock(), Mock(), Mock()))
+
 
 class SelfIPTest(SearxTestCase):  # pylint: disable=missing-class-docstring
     def test_PluginStore_init(self):
@@ -163,3 +183,47 @@ class HashPluginTest(SearxTestCase):  # pylint: disable=missing-class-docstring
             '18980772e473f8819a5d4940e0db27ac185f8a0e1d5f84f88bc887fd67b143732c304cc5'
             'fa9ad8e6f57f50028a8ff' in search.result_container.answers['hash']['answer']
         )
+
+
+class HostnamesPluginTest(SearxTestCase):  # pylint: disable=missing-class-docstring
+    def test_join_patterns(self):
+        _join_patterns = hostnames._join_patterns  # pylint: disable=protected-access
+        patterns = [
+            re.compile(r'(.*\.)?facebook.com$'),
+            re.compile(r'(.*\.)?google(\..*)?$'),
+            re.compile(r'^(a)\1$'),
+            re.compile(r'(?i)^foo\.'),
+        ]
+        joined = _join_patterns(patterns)
+        # the backreference and the inline flag are not joined
+        self.assertEqual(len(joined), 3)
+        for hostname in ('www.facebook.com', 'google.de', 'aa', 'FOO.org', 'example.com', 'facebook.com.example.org'):
+            self.assertEqual(
+                any(p.search(hostname) for p in joined), any(p.search(hostname) for p in patterns), hostname
+            )
+        self.assertEqual(_join_patterns({}), [])
+
+    def test_on_result_url_fields(self):
+        result = {
+            'url': 'https://www.youtube.com/watch?v=1',
+            'parsed_url': urlparse('https://www.youtube.com/watch?v=1'),
+            'iframe_src': 'https://www.youtube-nocookie.com/embed/1',
+            'audio_src': 'https://audio.example.org/1.mp3',
+        }
+        replacements = [(re.compile(r'(.*\.)?youtube(-nocookie)?\.com$'), 'yt.example.com')]
+        removables = [re.compile(r'^audio\.example\.org$')]
+        with patch.object(hostnames, 'replacements', replacements), patch.object(hostnames, 'removables', removables):
+            self.assertTrue(hostnames.on_result(None, None, result))
+        self.assertEqual(result['url'], 'https://yt.example.com/watch?v=1')
+        self.assertEqual(result['iframe_src'], 'https://yt.example.com/embed/1')
+        self.assertNotIn('audio_src', result)
+
+
+class OADoiRewritePluginTest(SearxTestCase):  # pylint: disable=missing-class-docstring
+    def test_extract_doi(self):
+        extract_doi = oa_doi_rewrite.extract_doi
+        self.assertEqual(extract_doi(urlparse('https://doi.org/10.1234/abc')), '10.1234/abc')
+        self.assertEqual(extract_doi(urlparse('https://example.org/a?doi=10.1234%2Fabc&b=1')), '10.1234/abc')
+        self.assertEqual(extract_doi(urlparse('https://example.org/a?doi=10%2E1234%2Fabc')), '10.1234/abc')
+        self.assertIsNone(extract_doi(urlparse('https://example.org/page?q=foo')))
+        self.assertIsNone(extract_doi(urlparse('https://example.org/10.1/page')))
@@ -8,6 +8,7 @@ from searx.preferences import (
     SearchLanguageSetting,
     MultipleChoiceSetting,
     PluginsSetting,
+    EnginesSetting,
     ValidationException,
 )
 from tests import SearxTestCase
@@ -21,6 +22,13 @@ class PluginStub:  # pylint: disable=missing-class-docstring, too-few-public-met
         self.default_on = default_on
 
 
+class EngineStub:  # pylint: disable=missing-class-docstring, too-few-public-methods
+    def __init__(self, name, categories, disabled=False):
+        self.name = name
+        self.categories = categories
+        self.disabled = disabled
+
+
 class TestSettings(SearxTestCase):  # pylint: disable=missing-class-docstring
     # map settings
 
@@ -120,6 +128,19 @@ class TestSettings(SearxTestCase):  # pylint: disable=missing-class-docstring
         setting = PluginsSetting('name', plugins=[plugin1, plugin2, plugin3])
         self.assertEqual(set(setting.get_enabled()), set(['plugin1', 'plugin3']))
 
+    # engines settings
+    def test_engines_setting(self):
+        engines = [EngineStub('engine1', ['general', 'not a tab']), EngineStub('engine2', ['images'], disabled=True)]
+        setting = EnginesSetting('engines', engines=engines)
+        self.assertEqual(setting.get_enabled(), [('engine1', 'general')])
+        self.assertEqual(setting.get_disabled(), [('engine2', 'images')])
+
+        # the default choices are shared by the instances, not the state
+        setting.parse_cookie('engine1__general', '')
+        self.assertEqual(setting.get_enabled(), [])
+        setting = EnginesSetting('engines', engines=engines)
+        self.assertEqual(setting.get_enabled(), [('engine1', 'general')])
+
 
 class TestPreferences(SearxTestCase):  # pylint: disable=missing-class-docstring
     def test_encode(self):